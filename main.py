@@ -3,21 +3,29 @@
 Bluesky Self-Follow Tool (improved)
 
 - Accepts either an AT handle (username.domain) or a DID (did:...)
-- Resolves handle -> DID (DNS _atproto TXT, /.well-known/atproto-did, fallback to public resolver)
+- Resolves handle -> DID (DNS _atproto TXT, /.well-known/atproto-did and public resolver, queried concurrently)
 - Resolves DID -> DID Document to find the user's PDS (#atproto_pds service entry)
-- Attempts login against the default service first, and if that fails tries the user's PDS
+- Attempts login against the default service while discovering the PDS in parallel; if that fails tries the user's PDS
 - Creates an app.bsky.graph.follow record pointing at your own DID
 
 Run: python main.py
+Batch: python main.py --batch handles.txt   (one handle per line, optionally followed by its app password)
 """
 
 from __future__ import annotations
+import argparse
+import os
+import queue
+import socket
 import sys
 import time
 import json
 import getpass
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Optional, Tuple
+from functools import lru_cache, wraps
+from typing import Any, Callable, NamedTuple, Optional, Tuple
 
 try:
     from atproto import Client
@@ -27,17 +35,244 @@ except ImportError:
 
 # Optional libs (dns.resolver speeds up DNS TXT resolution). If not installed, code falls back.
 try:
+    import dns.exception  # type: ignore
     import dns.resolver  # type: ignore
+    # One shared resolver so resolv.conf is parsed once. No answer cache: the memo / disk cache
+    # above already dedupe lookups, and a cached NXDOMAIN would defeat a retry after a DNS fix.
+    _DNS_RESOLVER = dns.resolver.Resolver()
 except Exception:
     dns = None  # type: ignore
+    _DNS_RESOLVER = None
+
+# Optional: orjson parses DID documents / XRPC responses several times faster than stdlib json.
+try:
+    import orjson  # type: ignore
+    _loads = orjson.loads
+except Exception:
+    _loads = json.loads
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP session: keep-alive lets repeat calls to bsky.social / plc.directory
+# reuse the pooled connection instead of paying a fresh TCP+TLS handshake each time.
+SESSION = requests.Session()
+# Longest Retry-After we are willing to sleep for; a larger value would hang the interactive prompt.
+MAX_RETRY_AFTER = 5.0
+
+class _CappedRetry(Retry):
+    """Retry that honours Retry-After but never waits longer than MAX_RETRY_AFTER."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+# Transient 429/5xx are retried here (honouring Retry-After) rather than in each helper.
+# Connect errors get one retry, read timeouts none, so the per-call timeouts stay the real budget.
+_retry = _CappedRetry(
+    total=2,
+    connect=1,
+    read=0,
+    other=0,
+    status_forcelist=[429, 502, 503, 504],
+    backoff_factor=0.3,
+    respect_retry_after_header=True,
+)
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_retry)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({"User-Agent": "bluesky-follow-self/1.0", "Accept": "application/json"})
+
+# (connect, read) timeouts: fail fast on unreachable hosts without cutting off slow bodies.
+Timeout = Tuple[float, float]
+
+# ATProto DIDs are did:plc or did:web; the universal resolver for anything else is opt-in (--enable-uniresolver)
+ENABLE_UNIRESOLVER = False
+
+# ---------- On-disk TTL cache ----------
+
+# Handle -> DID mappings and DID documents are near-static, so warm runs can skip the network.
+HANDLE_TTL = 300
+DIDDOC_TTL = 3600
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "bluesky-follow-self",
+    "cache.json",
+)
+
+# Expired entries that carry an ETag / Last-Modified are kept this long so they can be revalidated.
+STALE_KEEP = 7 * 24 * 3600
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+class _Fetched(NamedTuple):
+    """What a ttl_cache-wrapped fetcher returns: the value plus any caching hints from the response."""
+    value: Any
+    ttl: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+_cache: Optional[dict] = None
+_cache_lock = threading.Lock()
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            _cache = {
+                ns: {k: _CacheEntry(*v) for k, v in entries.items()}
+                for ns, entries in raw.items()
+            }
+        except Exception:
+            # missing or corrupt cache file - start empty
+            _cache = {}
+    return _cache
+
+def _save_cache() -> None:
+    tmp = CACHE_PATH + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({ns: {k: list(e) for k, e in entries.items()} for ns, entries in _cache.items()}, f)
+        os.replace(tmp, CACHE_PATH)
+    except Exception:
+        # caching is best-effort; never fail the flow because the disk is read-only
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def _max_age(r: requests.Response) -> Optional[int]:
+    """Return the Cache-Control max-age of a response, if any."""
+    for directive in r.headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age":
+            try:
+                return max(int(value.strip('"')), 0)
+            except ValueError:
+                return None
+    return None
+
+def _conditional_get(url: str, timeout: Timeout, stale: Optional[_CacheEntry], parse: Callable[[bytes], Any] = _loads) -> Optional[_Fetched]:
+    """
+    GET a JSON document, revalidating the stale cache entry (if any) with If-None-Match / If-Modified-Since.
+    On 304 returns the cached value; on 200 parse(body). Either way with the response's max-age and validators.
+    """
+    headers = {}
+    if stale is not None:
+        if stale.etag:
+            headers["If-None-Match"] = stale.etag
+        if stale.last_modified:
+            headers["If-Modified-Since"] = stale.last_modified
+    r = SESSION.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304 and stale is not None:
+        return _Fetched(
+            stale.value,
+            _max_age(r),
+            r.headers.get("ETag") or stale.etag,
+            r.headers.get("Last-Modified") or stale.last_modified,
+        )
+    if r.status_code == 200:
+        return _Fetched(parse(r.content), _max_age(r), r.headers.get("ETag"), r.headers.get("Last-Modified"))
+    return None
+
+def ttl_cache(ttl_seconds: int, validate: Optional[Callable[[Any], bool]] = None) -> Callable:
+    """
+    Cache a single-string-argument function on disk for ttl_seconds.
+    The wrapped fn(key, stale_entry_or_None) returns a _Fetched (or None); callers just get fn(key) -> value.
+    None results (and any rejected by validate) are not cached, so misses are retried next time.
+    """
+    def decorator(fn: Callable) -> Callable:
+        ns = fn.__name__
+
+        @wraps(fn)
+        def wrapper(key: str):
+            now = time.time()
+            with _cache_lock:
+                entry = _load_cache().get(ns, {}).get(key)
+            if entry is not None and now < entry.expires:
+                return entry.value
+            fetched = fn(key, entry)
+            if fetched is None:
+                return None
+            value = fetched.value
+            if value is None or (validate is not None and not validate(value)):
+                return None
+            # a server max-age may shorten the TTL but never extend it past our default
+            ttl = ttl_seconds if fetched.ttl is None else min(fetched.ttl, ttl_seconds)
+            with _cache_lock:
+                cache = _load_cache()
+                cache.setdefault(ns, {})[key] = _CacheEntry(value, now + ttl, fetched.etag, fetched.last_modified)
+                # drop expired entries so the file stays bounded
+                for entries in cache.values():
+                    for k in [k for k, e in entries.items() if e.expires + (STALE_KEEP if e.etag or e.last_modified else 0) <= now]:
+                        del entries[k]
+                _save_cache()
+            return value
+
+        def forget(key: str) -> Any:
+            """Drop key's on-disk entry; returns the value it held, if any."""
+            with _cache_lock:
+                entry = _load_cache().get(ns, {}).pop(key, None)
+                if entry is not None:
+                    _save_cache()
+            return entry.value if entry is not None else None
+
+        wrapper.forget = forget
+        return wrapper
+    return decorator
+
+def memoize_success(fn: Callable) -> Callable:
+    """
+    Process-lifetime memo for a single-string-argument function.
+    Unlike functools.lru_cache it never remembers None, so a transient failure is retried on the next call.
+    """
+    memo: dict = {}
+
+    @wraps(fn)
+    def wrapper(key: str):
+        with _cache_lock:
+            if key in memo:
+                return memo[key]
+        value = fn(key)
+        if value is not None:
+            with _cache_lock:
+                memo[key] = value
+        return value
+
+    def cache_clear() -> None:
+        with _cache_lock:
+            memo.clear()
+
+    def forget(key: str) -> Any:
+        """Drop key from the memo and from any cache underneath; returns the value it held, if any."""
+        with _cache_lock:
+            value = memo.pop(key, None)
+        inner_forget = getattr(fn, "forget", None)
+        if inner_forget is not None:
+            value = inner_forget(key) or value
+        return value
+
+    wrapper.cache_clear = cache_clear
+    wrapper.forget = forget
+    return wrapper
 
 # ---------- Helpers for identity resolution ----------
 
 def strip_at(h: str) -> str:
     return h[1:] if h.startswith("@") else h
 
+def _is_did(value: Any) -> bool:
+    """True for a plausible single-token DID string (rejects HTML error pages and other junk)."""
+    return isinstance(value, str) and value.startswith("did:") and len(value.split()) == 1
+
 def maybe_assume_bsky(handle: str) -> str:
     """
     If user provided a single token like 'alice' we assume alice.bsky.social.
@@ -49,18 +284,23 @@ def maybe_assume_bsky(handle: str) -> str:
         return f"{handle}.bsky.social"
     return handle
 
-def resolve_handle_via_dns(handle: str, timeout: float = 3.0) -> Optional[str]:
-    """Try DNS TXT _atproto.<domain> for a did=... record"""
+@lru_cache(maxsize=256)
+def _host_for_handle(handle: str) -> str:
+    """
+    The host both handle resolution methods query: the full handle itself
+    (alice.example.com -> _atproto.alice.example.com / https://alice.example.com/...), not its parent domain.
+    """
+    # defensive: drop anything after a stray '/'
+    return strip_at(handle).split("/", 1)[0].lower()
+
+def resolve_handle_via_dns(handle: str, timeout: float = 2.0) -> Optional[_Fetched]:
+    """Try DNS TXT _atproto.<handle> for a did=... record"""
     if dns is None:
         return None
+    query = f"_atproto.{_host_for_handle(handle)}"
     try:
-        name = strip_at(handle).split(".", 1)[1] if handle.count(".") >= 1 and not handle.startswith("did:") else strip_at(handle)
-    except Exception:
-        name = strip_at(handle)
-    query = f"_atproto.{name}"
-    try:
-        answers = dns.resolver.resolve(query, "TXT", lifetime=timeout)
-    except Exception:
+        answers = _DNS_RESOLVER.resolve(query, "TXT", lifetime=timeout)
+    except dns.exception.DNSException:
         return None
     for ans in answers:
         text = ans.to_text().strip()
@@ -68,77 +308,93 @@ def resolve_handle_via_dns(handle: str, timeout: float = 3.0) -> Optional[str]:
         if text.startswith('"') and text.endswith('"'):
             text = text[1:-1]
         if text.startswith("did="):
-            return text.split("=", 1)[1].strip()
+            return _Fetched(text.split("=", 1)[1].strip())
     return None
 
-def resolve_handle_via_well_known(handle: str, timeout: float = 4.0) -> Optional[str]:
+def resolve_handle_via_well_known(handle: str, timeout: Timeout = (2, 3)) -> Optional[_Fetched]:
     """
-    Fetch https://<domain>/.well-known/atproto-did
+    Fetch https://<handle>/.well-known/atproto-did
+    Returns the DID with the response's max-age, or None
     """
-    raw = strip_at(handle)
-    # get domain piece (username.domain => domain)
-    if "/" in raw:
-        # defensive
-        domain = raw.split("/", 1)[0].split(".", 1)[1] if "." in raw else raw
-    else:
-        domain = raw.split(".", 1)[1] if "." in raw else raw
-    if not domain:
+    host = _host_for_handle(handle)
+    if not host:
         return None
-    url = f"https://{domain}/.well-known/atproto-did"
+    url = f"https://{host}/.well-known/atproto-did"
     try:
-        r = requests.get(url, timeout=timeout)
+        r = SESSION.get(url, timeout=timeout)
         if r.status_code == 200:
-            return r.text.strip()
-    except Exception:
+            # many hosts answer every path with their HTML page; only accept a bare DID
+            text = r.text.strip()
+            if _is_did(text):
+                return _Fetched(text, _max_age(r))
+    except requests.exceptions.RequestException:
         return None
     return None
 
-def resolve_handle_public_api(handle: str, timeout: float = 4.0) -> Optional[str]:
+def resolve_handle_public_api(handle: str, timeout: Timeout = (2, 3)) -> Optional[_Fetched]:
     """
     Use a public resolver to ask the network for the DID for <handle>.
     This uses the well-known /xrpc/com.atproto.identity.resolveHandle on a public host.
     This is a fallback if DNS/.well-known didn't succeed.
+    Returns the DID with the response's max-age, or None
     """
     try:
         # use bsky.social as a public resolver (most clients do this)
         url = "https://bsky.social/xrpc/com.atproto.identity.resolveHandle"
         params = {"handle": strip_at(handle)}
-        r = requests.get(url, params=params, timeout=timeout)
+        r = SESSION.get(url, params=params, timeout=timeout)
         if r.status_code == 200:
-            data = r.json()
-            return data.get("did")
-    except Exception:
+            data = _loads(r.content)
+            did = data.get("did") if isinstance(data, dict) else None
+            # the bsky.social shortcut returns this directly, so reject junk here
+            if _is_did(did):
+                return _Fetched(did, _max_age(r))
+    except (requests.exceptions.RequestException, ValueError):
         return None
     return None
 
-def resolve_handle_to_did(handle: str) -> Optional[str]:
+@memoize_success
+@ttl_cache(ttl_seconds=HANDLE_TTL, validate=_is_did)
+def resolve_handle_to_did(handle: str, stale: Optional[_CacheEntry] = None) -> Optional[_Fetched]:
     """
-    Try: DNS TXT -> well-known -> public resolver
-    Returns DID string or None
+    Run DNS TXT, well-known and public resolver lookups concurrently.
+    Returns the first DID any of them produces, or None
+    (callers get the bare DID string; see ttl_cache)
     """
     handle = strip_at(handle)
-    # attempt DNS
-    did = None
+    if _host_for_handle(handle).endswith(".bsky.social"):
+        # bsky.social's own resolver is authoritative for its handles; skip the other lookups
+        return resolve_handle_public_api(handle)
+    resolvers = [resolve_handle_via_well_known, resolve_handle_public_api]
     if dns is not None:
+        resolvers.insert(0, resolve_handle_via_dns)
+    results: queue.Queue = queue.Queue()
+
+    def run(fn: Callable[[str], Optional[_Fetched]]) -> None:
         try:
-            did = resolve_handle_via_dns(handle)
+            results.put(fn(handle))
         except Exception:
-            did = None
-    if did:
-        return did
-    # well-known
-    did = resolve_handle_via_well_known(handle)
-    if did:
-        return did
-    # public resolver fallback
-    did = resolve_handle_public_api(handle)
-    return did
+            # one failing source must never block the others
+            results.put(None)
+
+    # Daemon threads: once one lookup answers, the slower ones are left to finish
+    # in the background (their results are discarded) without holding up exit.
+    for fn in resolvers:
+        threading.Thread(target=run, args=(fn,), daemon=True).start()
+    for _ in resolvers:
+        fetched = results.get()
+        if fetched is not None and _is_did(fetched.value):
+            return fetched
+    return None
 
-def fetch_did_document(did: str) -> Optional[dict]:
+@memoize_success
+@ttl_cache(ttl_seconds=DIDDOC_TTL)
+def fetch_did_document(did: str, stale: Optional[_CacheEntry] = None) -> Optional[_Fetched]:
     """
     For did:web: fetch domain's /.well-known/did.json
     For did:plc: call the plc.directory resolver (https://plc.directory/<did>)
-    Returns parsed JSON DID document or None
+    For other methods: ask uniresolver.io, only with --enable-uniresolver
+    Returns parsed JSON DID document or None (callers get the bare dict; see ttl_cache)
     """
     if did.startswith("did:web:"):
         # did:web:example.com or did:web:sub:example.com => domain = replace ':' after prefix with '/'
@@ -146,36 +402,45 @@ def fetch_did_document(did: str) -> Optional[dict]:
         domain = suffix.replace(":", "/")
         url = f"https://{domain}/.well-known/did.json"
         try:
-            r = requests.get(url, timeout=5)
-            if r.status_code == 200:
-                return r.json()
-        except Exception:
+            return _conditional_get(url, timeout=(2, 5), stale=stale, parse=lambda raw: _parse_did_doc(raw, did))
+        except (requests.exceptions.RequestException, ValueError):
             return None
-        return None
     elif did.startswith("did:plc:") or did.startswith("did:plc"):
         # PLC DID resolution via the PLC directory service
         try:
             url = f"https://plc.directory/{did}"
-            r = requests.get(url, timeout=6)
-            if r.status_code == 200:
-                return r.json()
-        except Exception:
+            return _conditional_get(url, timeout=(2, 6), stale=stale, parse=lambda raw: _parse_did_doc(raw, did))
+        except (requests.exceptions.RequestException, ValueError):
             return None
-        return None
     else:
-        # Unknown DID method - try universal resolver or return None
+        # Unknown DID method - try universal resolver if enabled, else return None
+        if not ENABLE_UNIRESOLVER:
+            return None
         try:
             url = f"https://uniresolver.io/1.0/identifiers/{did}"
-            r = requests.get(url, timeout=6)
+            r = SESSION.get(url, timeout=(2, 6))
             if r.status_code == 200:
-                payload = r.json()
+                payload = _loads(r.content)
                 # Some universal resolvers embed the DID doc under 'didDocument'
                 if isinstance(payload, dict) and "didDocument" in payload:
-                    return payload["didDocument"]
-        except Exception:
+                    return _Fetched(payload["didDocument"])
+        except (requests.exceptions.RequestException, ValueError):
             return None
         return None
 
+def _parse_did_doc(raw_bytes: bytes, did: str) -> dict:
+    """
+    Parse a DID document and reduce it to {id, service: [pds entry]} so the cache entry stays small.
+    Documents without a recognisable '#atproto_pds' entry are kept whole (which also keeps the debug dump useful).
+    """
+    doc = _loads(raw_bytes)
+    if not isinstance(doc, dict):
+        raise ValueError("DID document is not a JSON object")
+    for s in doc.get("service") or []:
+        if isinstance(s, dict) and str(s.get("id", "")).endswith("#atproto_pds"):
+            return {"id": did, "service": [s]}
+    return doc
+
 def extract_pds_from_did_doc(did_doc: dict, did: str) -> Optional[str]:
     """
     Look for the service entry with id ending '#atproto_pds' or service.id == '#atproto_pds'
@@ -197,14 +462,66 @@ def extract_pds_from_did_doc(did_doc: dict, did: str) -> Optional[str]:
             return ep.rstrip("/")
     return None
 
+def forget_identity(handle_or_did: str) -> None:
+    """
+    Drop the memoized and on-disk handle -> DID mapping and DID document for handle_or_did,
+    e.g. when login against the cached PDS fails after the account migrated.
+    """
+    if handle_or_did.startswith("did:"):
+        did = handle_or_did
+    else:
+        did = None
+        for key in {handle_or_did, strip_at(handle_or_did)}:
+            did = resolve_handle_to_did.forget(key) or did
+    if did:
+        fetch_did_document.forget(did)
+
+def prewarm_dns(handle_or_did: str) -> None:
+    """
+    Resolve the hosts login is likely to hit in a background thread,
+    so the OS resolver cache is warm by the time the password has been typed.
+    """
+    hosts = ["bsky.social", "plc.directory"]
+    if not handle_or_did.startswith("did:"):
+        hosts.append(_host_for_handle(handle_or_did))
+
+    def warm():
+        for host in hosts:
+            try:
+                socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+            except (OSError, UnicodeError):
+                # UnicodeError: IDNA rejects empty or over-long labels (e.g. a typo like 'alice..example.com')
+                pass
+
+    threading.Thread(target=warm, daemon=True).start()
+
+def discover_pds(handle_or_did: str) -> Tuple[Optional[str], Optional[dict], Optional[str]]:
+    """
+    Resolve handle -> DID -> DID document -> PDS endpoint.
+    Returns (did, did_doc, pds_host); the first step that fails leaves it and the rest as None.
+    """
+    try:
+        if handle_or_did.startswith("did:"):
+            did = handle_or_did
+        else:
+            did = resolve_handle_to_did(handle_or_did)
+        if not did:
+            return None, None, None
+        did_doc = fetch_did_document(did)
+        if not did_doc:
+            return did, None, None
+        return did, did_doc, extract_pds_from_did_doc(did_doc, did)
+    except Exception:
+        return None, None, None
+
 # ---------- ATProto login & follow functions ----------
 
-def try_login(client_base_url: Optional[str], identifier: str, app_password: str) -> Tuple[Optional[Client], Optional[dict]]:
+def try_login(client_base_url: Optional[str], identifier: str, app_password: str) -> Tuple[Optional[Client], Any]:
     """
     Try to login with atproto.Client.
     client_base_url: if provided, instantiate Client(client_base_url), otherwise default Client()
     identifier: handle or DID depending on PDS rules — we will pass the same thing the SDK expects (usually handle)
-    returns (client_instance or None, profile dict or None)
+    returns (client_instance, SDK profile model) on success, (None, {"error": message}) on failure
     """
     try:
         if client_base_url:
@@ -218,15 +535,7 @@ def try_login(client_base_url: Optional[str], identifier: str, app_password: str
             client = Client()
         # login either returns a profile object or raises
         profile = client.login(identifier, app_password)
-        # profile might be a model object; try to coerce to dict for convenience
-        try:
-            p = profile.__dict__
-        except Exception:
-            try:
-                p = dict(profile)
-            except Exception:
-                p = profile
-        return client, p
+        return client, profile
     except Exception as e:
         # caller inspects the exception
         return None, {"error": str(e)}
@@ -234,7 +543,7 @@ def try_login(client_base_url: Optional[str], identifier: str, app_password: str
 def login_flow(raw_input_handle: str) -> Optional[Tuple[Client, str]]:
     """
     Return (client, user_did) or None if failed.
-    Implements: quick try default -> on 401 try to resolve handle -> find PDS -> retry
+    Implements: quick try default (resolving handle -> PDS concurrently) -> on failure retry against the PDS
     """
     # Normalize input
     input_val = raw_input_handle.strip()
@@ -250,36 +559,38 @@ def login_flow(raw_input_handle: str) -> Optional[Tuple[Client, str]]:
 
     identifier_for_login = input_val  # usually the handle
 
+    prewarm_dns(input_val)
     app_password = getpass.getpass("Enter your Bluesky app password: ").strip()
     if not app_password:
         print("No password provided.")
         return None
 
-    # 1) Quick attempt against default service (many users are on bsky.social)
+    # 1) Quick attempt against default service (many users are on bsky.social),
+    #    while resolving handle -> DID -> PDS on a daemon thread in case it fails.
+    #    If the quick login wins, discovery just finishes in the background (warming the
+    #    caches) and never holds up exit.
     print("Trying quick login against the default public service (bsky.app / bsky.social)...")
+    fut_resolve: Future = Future()
+    # discover_pds never raises, so the future always gets a result
+    threading.Thread(target=lambda: fut_resolve.set_result(discover_pds(input_val)), daemon=True).start()
     client, profile_or_err = try_login(None, identifier_for_login, app_password)
     if client:
-        # success. find DID
-        user_did = getattr(client.me, "did", None) or (profile_or_err.get("did") if isinstance(profile_or_err, dict) else None)
-        if not user_did:
-            # try the profile object
-            try:
-                user_did = profile_or_err.get("did") if isinstance(profile_or_err, dict) else None
-            except Exception:
-                user_did = None
+        # success. find DID (client.me is set by login; fall back to the returned profile)
+        try:
+            user_did = client.me.did
+        except AttributeError:
+            user_did = getattr(profile_or_err, "did", None)
         print("✓ Logged in (default service).")
         return client, user_did or identifier_for_login
 
-    # If not client, figure out error cause and attempt resolution
+    # If not client, figure out error cause; resolution has been running meanwhile
     err_text = profile_or_err.get("error", "<unknown>") if isinstance(profile_or_err, dict) else str(profile_or_err)
     print(f"Quick login failed: {err_text}")
 
     # 2) Resolve handle -> DID (DNS / well-known / public resolver)
-    if input_val.startswith("did:"):
-        did = input_val
-    else:
+    if not input_val.startswith("did:"):
         print("Resolving handle to DID (DNS /.well-known / public resolver)...")
-        did = resolve_handle_to_did(input_val)
+    did, did_doc, pds_host = fut_resolve.result()
 
     if not did:
         print("Could not resolve handle to a DID automatically. Make sure the handle is correct and the domain exposes the _atproto TXT or /.well-known/atproto-did. You can also supply a DID directly (did:web:... or did:plc:...).")
@@ -287,13 +598,11 @@ def login_flow(raw_input_handle: str) -> Optional[Tuple[Client, str]]:
 
     print(f"Resolved handle -> DID: {did}")
 
-    # 3) Fetch DID document and find PDS
-    did_doc = fetch_did_document(did)
+    # 3) DID document and PDS were fetched alongside the DID
     if not did_doc:
         print("Could not fetch DID document to discover the PDS. For did:web this is at /.well-known/did.json; for did:plc we query the plc.directory resolver.")
         return None
 
-    pds_host = extract_pds_from_did_doc(did_doc, did)
     if not pds_host:
         print("DID document did not contain an #atproto_pds entry. Without a PDS endpoint we cannot log in directly. Here is the DID document (truncated):")
         print(json.dumps(did_doc, indent=2)[:2000])
@@ -304,12 +613,17 @@ def login_flow(raw_input_handle: str) -> Optional[Tuple[Client, str]]:
     # 4) Attempt login against that PDS
     client, profile_or_err = try_login(pds_host, identifier_for_login, app_password)
     if client:
-        user_did = getattr(client.me, "did", None) or did
+        try:
+            user_did = client.me.did
+        except AttributeError:
+            user_did = did
         print("✓ Logged in to user's PDS.")
         return client, user_did
     else:
         err_text = profile_or_err.get("error", "<unknown>") if isinstance(profile_or_err, dict) else str(profile_or_err)
         print(f"Login against the discovered PDS failed: {err_text}")
+        # the cached DID document may point at a PDS the account has since left
+        forget_identity(input_val)
         print("Common causes: 1) incorrect app password (make sure you used an app/password from Settings → App Passwords), or 2) the account is on a different PDS than what's listed in the DID document (rare).")
         return None
 
@@ -318,7 +632,8 @@ def follow_self(client: Client, user_did: str) -> bool:
     Create an app.bsky.graph.follow record where subject == your DID.
     Uses dict-based payload for compatibility.
     """
-    now_iso = datetime.now(timezone.utc).astimezone().isoformat()
+    # plain UTC "Z" timestamp, as the record schema expects; no local tz lookup
+    now_iso = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     payload = {
         "repo": user_did,
         "collection": "app.bsky.graph.follow",
@@ -334,6 +649,100 @@ def follow_self(client: Client, user_did: str) -> bool:
         print(f"Error while creating follow record: {e}")
         return False
 
+# ---------- Batch mode ----------
+
+BATCH_WORKERS = 8
+# Concurrent logins / writes allowed against any one PDS, to stay clear of rate limits
+PER_PDS_CONCURRENCY = 2
+
+def read_batch_file(path: str) -> list[Tuple[str, Optional[str]]]:
+    """
+    Parse a batch file: one 'handle [app-password]' per line; blank lines and '#' comments are skipped.
+    Repeated handles are reported and only their first line is used.
+    Returns [(handle, app_password or None)].
+    """
+    entries = []
+    seen = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 1)
+            handle = maybe_assume_bsky(strip_at(parts[0]))
+            key = handle.lower()
+            if key in seen:
+                print(f"Warning: line {lineno}: {handle} already listed on line {seen[key]}; ignoring this line.")
+                continue
+            seen[key] = lineno
+            entries.append((handle, parts[1].strip() if len(parts) > 1 else None))
+    return entries
+
+def _batch_follow_one(handle: str, app_password: str, did: str, pds_host: str, limit: threading.Semaphore) -> bool:
+    with limit:
+        client, profile_or_err = try_login(pds_host, handle, app_password)
+        if not client:
+            err_text = profile_or_err.get("error", "<unknown>") if isinstance(profile_or_err, dict) else str(profile_or_err)
+            print(f"{handle}: login failed: {err_text}")
+            return False
+        try:
+            user_did = client.me.did
+        except AttributeError:
+            user_did = did
+        ok = follow_self(client, user_did)
+        try:
+            client.logout()
+        except Exception:
+            pass
+    print(f"{handle}: {'✓ followed self' if ok else 'failed to create follow record'}")
+    return ok
+
+def batch_main(path: str) -> int:
+    """
+    Self-follow every account listed in path. Handles are resolved to their PDS concurrently,
+    then each account logs in directly against its PDS (no default-service attempt).
+    Every account still needs its own login: a session can only write to its own repo.
+    Returns the number of accounts that failed.
+    """
+    try:
+        entries = read_batch_file(path)
+    except (OSError, ValueError) as e:
+        # ValueError covers files that aren't valid UTF-8
+        print(f"Could not read batch file: {e}")
+        return 1
+    if not entries:
+        print("Batch file contains no handles.")
+        return 0
+
+    # Prompt for missing passwords up front so the concurrent phase never blocks on input
+    passwords = {}
+    for handle, app_password in entries:
+        passwords[handle] = app_password or getpass.getpass(f"App password for {handle}: ").strip()
+
+    handles = list(passwords)
+    print(f"Resolving {len(handles)} handle(s)...")
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        resolved = list(pool.map(discover_pds, handles))
+
+    failures = 0
+    jobs = []
+    limits: dict[str, threading.Semaphore] = {}
+    for handle, (did, _did_doc, pds_host) in zip(handles, resolved):
+        if not pds_host:
+            print(f"{handle}: could not resolve a PDS (DID: {did or 'unresolved'})")
+            failures += 1
+            continue
+        limit = limits.setdefault(pds_host, threading.Semaphore(PER_PDS_CONCURRENCY))
+        jobs.append((handle, passwords[handle], did, pds_host, limit))
+
+    print(f"Following {len(jobs)} account(s) across {len(limits)} PDS host(s)...")
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        results = list(pool.map(lambda job: _batch_follow_one(*job), jobs))
+    failures += results.count(False)
+
+    print(f"Done: {len(results) - results.count(False)} succeeded, {failures} failed.")
+    return failures
+
 # ---------- CLI / flow ----------
 
 def confirm(prompt: str) -> bool:
@@ -346,35 +755,62 @@ def confirm(prompt: str) -> bool:
         print("Please answer 'y' or 'n'.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Make Bluesky accounts follow themselves.")
+    parser.add_argument("--batch", metavar="PATH", help="file with one 'handle [app-password]' per line; self-follows every account in one run")
+    parser.add_argument("--enable-uniresolver", action="store_true", help="resolve non-plc/web DIDs via uniresolver.io")
+    args = parser.parse_args()
+
+    global ENABLE_UNIRESOLVER
+    ENABLE_UNIRESOLVER = args.enable_uniresolver
+
+    if args.batch:
+        failures = batch_main(args.batch)
+        SESSION.close()
+        sys.exit(1 if failures else 0)
+
     print("Bluesky Self-Follow Tool — improved")
     print("=" * 40)
     print("You will be prompted for your handle (or DID) and an app password (NOT your account password).")
     print("If you only type a username, we assume username.bsky.social.\n")
 
+    # Logged-in clients are kept for the whole session so re-entering the same account skips login
+    clients_by_did: dict[str, Client] = {}
+
     while True:
         handle = input("Enter your Bluesky handle (e.g., username.bsky.social) or DID (did:...): ").strip()
         if not handle:
             print("Handle cannot be empty.")
             continue
 
-        login_result = login_flow(handle)
+        login_result = None
+        if clients_by_did:
+            # only worth resolving up front once there is a session to reuse (lookups are cached)
+            known = maybe_assume_bsky(strip_at(handle))
+            known_did = known if known.startswith("did:") else resolve_handle_to_did(known)
+            if known_did in clients_by_did:
+                print("✓ Reusing existing session.")
+                login_result = clients_by_did[known_did], known_did
+        if not login_result:
+            login_result = login_flow(handle)
         if not login_result:
             print("Login sequence failed. Try again or check that you are using an app password.")
             try_again = input("Try another handle? (y/N): ").strip().lower()
             if try_again in ("y", "yes"):
+                # forget the lookups memoized so far, and this handle's disk entries,
+                # so the next attempt goes back to the network
+                forget_identity(maybe_assume_bsky(handle))
+                resolve_handle_to_did.cache_clear()
+                fetch_did_document.cache_clear()
                 continue
             else:
                 break
 
         client, user_did = login_result
+        clients_by_did[user_did] = client
         display_handle = strip_at(handle) if not handle.startswith("did:") else user_did
 
         print(f"\nAbout to create a self-follow for {display_handle} (DID: {user_did}).")
         if not confirm("Are you sure you want to proceed"):
-            try:
-                client.logout()
-            except Exception:
-                pass
             if confirm("Try another account?"):
                 continue
             else:
@@ -387,16 +823,17 @@ def main():
         else:
             print("Failed to create follow record. See messages above.")
 
-        try:
-            client.logout()
-        except Exception:
-            pass
-
         if confirm("Follow another account?"):
             continue
         else:
             break
 
+    for client in clients_by_did.values():
+        try:
+            client.logout()
+        except Exception:
+            pass
+    SESSION.close()
     print("Done. Goodbye.")
     sys.exit(0)
 